@@ -9,38 +9,255 @@ also prevents right-hand-following from working.
 """
 
 import argparse
+import array
+import functools
+import hashlib
 import random
+import struct
+import sys
+import zlib
 
-class DisjointCell:
-    """A single cell in a disjoint-set forest."""
-    __slots__ = ("rank", "parent")
-
-    def __init__(self):
-        self.rank = 0
-        self.parent = self
-
-    def top(self):
-        """Return the set this cell belongs to."""
-        i = self.parent
-        if i != self:
-            i = i.top()
-            self.parent = i
-        return i
-
-    def union(self, other):
-        """Union the set of this cell with 'other'."""
-        mine = self.top()
-        other = other.top()
-        if mine.rank >= other.rank:
-            other.parent = mine
+import numpy as np
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+    def njit(**_kwargs):
+        def wrap(func):
+            return func
+        return wrap
+
+# The two valid weave states: vertical on top (7) or horizontal on top (11).
+_WEAVE_CHOICES = (7, 11)
+
+# Two lines of box-drawing characters per glyph index; see print_maze.
+_RAW_CELLS = """
+┌─┐
+└─┘
+┌─┐
+│ │
+┌──
+└──
+┌──
+│ ┌
+│ │
+└─┘
+│ │
+│ │
+│ └
+└──
+│ └
+│ ┌
+──┐
+──┘
+──┐
+┐ │
+───
+───
+───
+┐ ┌
+┘ │
+──┘
+┘ │
+┐ │
+┘ └
+───
+┘ └
+┐ ┌
+┤ ├
+┤ ├
+┴─┴
+┬─┬""".strip().split("\n")
+
+# Rendering tables, built once at import: for each space-character variant,
+# a pair of object arrays (top line, bottom line) indexed by glyph index.
+_CELL_GLYPHS_BY_SPACE = {
+    c: tuple(np.array([line.replace(' ', c) for line in _RAW_CELLS[row::2]],
+                      dtype=object)
+             for row in range(2))
+    for c in ('\x20', '\xa0', '\xb7')
+}
+
+
+def _build_idx_lut():
+    """Build the glyph-index table for print_maze.
+
+    Keys are conn | left_bit << 4 | up_bit << 5, where the left/up bits say
+    whether the neighboring cells have passages in. Encodes the per-cell
+    index formula, including the weave override, as one table gather.
+    """
+    lut = np.empty(64, dtype=np.uint8)
+    for key in range(64):
+        c = key & 15
+        left = (key >> 4) & 1
+        up = (key >> 5) & 1
+        idx = (left << 1 | up) << 2 | c
+        if c > 3:
+            idx = 15 + c // 4
+        lut[key] = idx
+    return lut
+
+_IDX_LUT = _build_idx_lut()
+
+
+def _seed_to_int(seed):
+    """Hash a seed (usually a string) to a 64-bit int for NumPy RNGs."""
+    digest = hashlib.blake2b(str(seed).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+@functools.lru_cache(maxsize=32)
+def _walls_for(w, h):
+    """Return the unshuffled wall table for a w x h maze.
+
+    Each wall packs into one int64 as pos | neighbor << 24 | direction << 48,
+    computed up front so the generation loop does no per-wall division or
+    direction branch, and the shuffle moves single words instead of rows.
+    24 bits per cell index caps mazes at ~16.7M cells, far beyond anything
+    printable. Cached by size, since repeated calls differ only in the
+    shuffle.
+    """
+    vpos = np.arange(w*(h-1), dtype=np.int64)
+    yy, xx = np.divmod(np.arange(h*(w-1), dtype=np.int64), max(w-1, 1))
+    hpos = yy*w + xx
+    nvert = len(vpos)
+    walls = np.empty(nvert + len(hpos), dtype=np.int64)
+    walls[:nvert] = vpos | (vpos + w) << 24 | 1 << 48
+    walls[nvert:] = hpos | (hpos + 1) << 24 | 2 << 48
+    return walls
+
+
+@njit(cache=True)
+def _genmaze_core(w, h, walls, weave_fraction, seed):
+    """Kruskal + weave inner loop, JIT-compiled when Numba is available.
+
+    Mirrors _genmaze_py; see genmaze for the meaning of the conn bitfields.
+    Returns conn as a uint8 array.
+    """
+    np.random.seed(seed)
+    size = w * h
+    parent = np.arange(size)
+    rank = np.zeros(size, dtype=np.int8)
+    conn = np.zeros(size, dtype=np.uint8)
+
+    def find(x):
+        # Iterative path halving: no recursion, and the path shortens on
+        # every traversal without a second pass.
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union_roots(a, b):
+        # Union by rank. Both arguments must be current roots.
+        if rank[a] > rank[b]:
+            parent[b] = a
+        elif rank[a] < rank[b]:
+            parent[a] = b
         else:
-            mine.parent = other
+            parent[b] = a
+            rank[a] += 1
 
+    # Interior positions where a weave can still be carved, as a sampling
+    # list plus an index map for O(1) swap-removal. Carving can only
+    # invalidate positions, so the list only shrinks. nvalid is a length-1
+    # array so the closure can update it.
+    valid = np.empty(size, dtype=np.int64)
+    where = np.full(size, -1, dtype=np.int64)
+    nvalid = np.zeros(1, dtype=np.int64)
+    for y in range(1, h-1):
+        for x in range(1, w-1):
+            pos = y * w + x
+            valid[nvalid[0]] = pos
+            where[pos] = nvalid[0]
+            nvalid[0] += 1
+
+    def maybe_discard(p):
+        # Drop p from the candidates if it now has any connections beyond 1
+        # or straight through.
+        if p >= size:
+            return
+        i = where[p]
+        if i >= 0 and (conn[p-1]&2 | conn[p-w]&1 | conn[p]) >= 3:
+            n = nvalid[0] - 1
+            last = valid[n]
+            valid[i] = last
+            where[last] = i
+            where[p] = -1
+            nvalid[0] = n
+
+    # Kruskal's can stop once a single component remains: every further
+    # wall or weave is an intra-tree rejection.
+    remaining = size - 1
+    for wi in range(len(walls)):
+        # Make weaves first, possibly several
+        while nvalid[0] > 0 and np.random.random() < weave_fraction:
+            pos = valid[np.random.randint(0, nvalid[0])]
+            cell1 = pos - (1 - (conn[pos-1] & 2) // 2)
+            cell2 = pos + (1 - (conn[pos] & 2) // 2)
+            r1 = find(cell1)
+            r2 = find(cell2)
+            # Equal cell indices mean a straight-through passage: that
+            # "union" is middle-to-middle, a no-op, and must not abort the
+            # weave. Otherwise a single root compare decides.
+            if cell1 != cell2 and r1 == r2:
+                continue
+            cell3 = pos - w * (1 - (conn[pos-w] & 1))
+            cell4 = pos + w * (1 - (conn[pos] & 1))
+            r3 = find(cell3)
+            r4 = find(cell4)
+            if cell3 != cell4 and r3 == r4:
+                continue
+            if r1 != r2:
+                union_roots(r1, r2)
+                remaining -= 1
+            if r3 != r4:
+                # The first union may have reparented r3 or r4; re-finding
+                # from a root is at most one step.
+                r3 = find(r3)
+                r4 = find(r4)
+                if r3 != r4:
+                    union_roots(r3, r4)
+                    remaining -= 1
+            # Carve the passages.
+            conn[pos] = 7 if np.random.randint(0, 2) == 0 else 11
+            conn[pos-1] |= 2
+            conn[pos-w] |= 1
+            # Re-check every position whose validity reads a changed byte.
+            maybe_discard(pos)
+            maybe_discard(pos+1)
+            maybe_discard(pos-1)
+            maybe_discard(pos+w)
+            maybe_discard(pos-w)
+            maybe_discard(pos+w-1)
+            maybe_discard(pos-w+1)
+        if remaining == 0:
+            break
+        packed = walls[wi]
+        pos = packed & 0xFFFFFF
+        dirr = packed >> 48
+        if conn[pos] & dirr:
+            continue
+        cell1 = find(pos)
+        cell2 = find((packed >> 24) & 0xFFFFFF)
+        if cell1 == cell2:
+            continue
+        conn[pos] |= dirr
+        maybe_discard(pos)
+        maybe_discard(pos+1)
+        maybe_discard(pos+w)
+        union_roots(cell1, cell2)
+        remaining -= 1
+        if remaining == 0:
+            break
+    return conn
 
 def genmaze(options):
     """Generate a maze with the given options.
 
-    Returns a width * height array of bitfields.
+    Returns a width * height uint8 array of bitfields.
     Bit 0 = Passage to the south
     Bit 1 = Passage to the east
     Bit 2 = Weave, vertical on top
@@ -51,61 +268,147 @@ def genmaze(options):
     """
     w = options.width
     h = options.height
+    # permutation() copies, so the cached wall table is never mutated.
+    walls = np.random.default_rng(_seed_to_int(options.seed)).permutation(
+        _walls_for(w, h))
+    if HAVE_NUMBA:
+        # Numba's np.random.seed takes a 32-bit seed.
+        return _genmaze_core(w, h, walls, options.weave_fraction,
+                             _seed_to_int(options.seed) & 0xFFFFFFFF)
+    # tolist() up front: iterating a Python list beats iterating an ndarray
+    # element-by-element in CPython.
+    conn = _genmaze_py(w, h, walls.tolist(), options.weave_fraction,
+                       random.Random(options.seed))
+    # Same uint8 view of the buffer as the Numba path, so the renderers can
+    # reshape and slice it without re-boxing every byte.
+    return np.frombuffer(conn, dtype=np.uint8)
+
+
+def _genmaze_py(w, h, walls, weave_fraction, rng):
+    """Pure-Python fallback for _genmaze_core, used when Numba is missing."""
     size = w * h
-    sets = [DisjointCell() for i in range(size)]
-    conn = [0] * size
-    rng = random.Random(options.seed)
-    # Create a shuffled order of walls to carve
-    walls = [i*2 for i in range(w*(h-1))]
-    walls += [(y*w + x)*2 + 1 for y in range(h) for x in range(w-1)]
-    rng.shuffle(walls)
-    # Perform Kruskal's algorithm
-    for wall in walls:
+    # Disjoint-set forest as flat arrays: parent pointers and ranks, indexed
+    # by cell position. array.array stores raw C ints, so assignments don't
+    # create or refcount PyObjects the way a list of ints would.
+    parent = array.array('i', range(size))
+    rank = array.array('b', bytes(size))
+
+    def find(x, p=parent):
+        """Return the root of the set cell 'x' belongs to, halving the path."""
+        while p[x] != x:
+            p[x] = p[p[x]]
+            x = p[x]
+        return x
+
+    def union_roots(a, b):
+        """Union by rank. Both arguments must be current roots."""
+        if rank[a] > rank[b]:
+            parent[b] = a
+        elif rank[a] < rank[b]:
+            parent[a] = b
+        else:
+            parent[b] = a
+            rank[a] += 1
+
+    # conn holds 4-bit fields, so a bytearray keeps the values unboxed and
+    # one byte each.
+    conn = bytearray(size)
+    # Interior positions where a weave can still be carved, as a sampling
+    # list plus an index map for O(1) swap-removal. Carving can only
+    # invalidate positions, so the list only shrinks.
+    valid = [y*w + x for y in range(1, h-1) for x in range(1, w-1)]
+    where = [-1] * size
+    for i, pos in enumerate(valid):
+        where[pos] = i
+
+    def maybe_discard(p):
+        """Drop p from the weave candidates if carving has invalidated it.
+
+        A position is invalid once it has any connections beyond 1 or
+        straight through.
+        """
+        if p >= size:
+            return
+        i = where[p]
+        if i >= 0 and (conn[p-1]&2 | conn[p-w]&1 | conn[p]) >= 3:
+            last = valid[-1]
+            valid[i] = last
+            where[last] = i
+            valid.pop()
+            where[p] = -1
+
+    # Bind the hot lookups to locals, out of the loops below.
+    rand = rng.random
+    randrange = rng.randrange
+    choice = rng.choice
+    wf = weave_fraction
+    # Perform Kruskal's algorithm. It can stop once a single component
+    # remains: every further wall or weave is an intra-tree rejection.
+    remaining = size - 1
+    for packed in walls:
         # Make weaves first, possibly several
-        while rng.random() < options.weave_fraction:
-            x, y = rng.randrange(1, w-1), rng.randrange(1, h-1)
-            pos = y * w + x
-            # Abort if we have any connections beyond 1 or straight through.
-            # This automatically rules out a weave on this square (but not
-            # adjacent squares).
-            if (conn[pos-1]&2 | conn[pos-w]&1 | conn[pos]) >= 3:
-                continue
+        while valid and rand() < wf:
+            pos = valid[randrange(len(valid))]
             # Connect across the weave branches. If there is already a passage in,
             # then the set we need to connect from is the middle instead of the
             # arm. If there is a straight-across, we connect the middle to the
             # middle, which is a no-op.
-            cell1 = sets[pos - (1 - (conn[pos-1] & 2) // 2)]
-            cell2 = sets[pos + (1 - (conn[pos] & 2) // 2)]
-            if cell1 != cell2:
-                cell1 = cell1.top()
-                cell2 = cell2.top()
-                if cell1 == cell2:
-                    continue
-            cell3 = sets[pos - w * (1 - (conn[pos-w] & 1))]
-            cell4 = sets[pos + w * (1 - (conn[pos] & 1))]
-            if cell3 != cell4:
-                cell3 = cell3.top()
-                cell4 = cell4.top()
-                if cell3 == cell4:
-                    continue
-            cell1.union(cell2)
-            cell3.union(cell4)
+            cell1 = pos - (1 - (conn[pos-1] & 2) // 2)
+            cell2 = pos + (1 - (conn[pos] & 2) // 2)
+            r1 = find(cell1)
+            r2 = find(cell2)
+            # Equal cell indices mean a straight-through passage: that
+            # "union" is middle-to-middle, a no-op, and must not abort the
+            # weave. Otherwise a single root compare decides.
+            if cell1 != cell2 and r1 == r2:
+                continue
+            cell3 = pos - w * (1 - (conn[pos-w] & 1))
+            cell4 = pos + w * (1 - (conn[pos] & 1))
+            r3 = find(cell3)
+            r4 = find(cell4)
+            if cell3 != cell4 and r3 == r4:
+                continue
+            if r1 != r2:
+                union_roots(r1, r2)
+                remaining -= 1
+            if r3 != r4:
+                # The first union may have reparented r3 or r4; re-finding
+                # from a root is at most one step.
+                r3 = find(r3)
+                r4 = find(r4)
+                if r3 != r4:
+                    union_roots(r3, r4)
+                    remaining -= 1
             # Carve the passages.
-            conn[pos] = rng.choice([7, 11])
+            conn[pos] = choice(_WEAVE_CHOICES)
             conn[pos-1] |= 2
             conn[pos-w] |= 1
-        pos = wall // 2
-        dirr = (wall&1) + 1
+            # Re-check every position whose validity reads a changed byte.
+            maybe_discard(pos)
+            maybe_discard(pos+1)
+            maybe_discard(pos-1)
+            maybe_discard(pos+w)
+            maybe_discard(pos-w)
+            maybe_discard(pos+w-1)
+            maybe_discard(pos-w+1)
+        if remaining == 0:
+            break
+        pos = packed & 0xFFFFFF
+        dirr = packed >> 48
         if conn[pos] & dirr:
             continue
-        cell1 = sets[pos].top()
-        cell2 = sets[pos + (w if dirr == 1 else 1)].top()
+        cell1 = find(pos)
+        cell2 = find((packed >> 24) & 0xFFFFFF)
         if cell1 == cell2:
             continue
         conn[pos] |= dirr
-        cell1.union(cell2)
-        y = wall // (w*2)
-        x = wall // 2 - y*w
+        maybe_discard(pos)
+        maybe_discard(pos+1)
+        maybe_discard(pos+w)
+        union_roots(cell1, cell2)
+        remaining -= 1
+        if remaining == 0:
+            break
     return conn
 
 
@@ -115,61 +418,29 @@ def print_maze(conn, options):
     Assumes entrance/exit at top-left/bottom-right.
     """
     space_char = {"space": '\x20', "nbsp": '\xa0', "dot": '\xb7'}[options.space]
-    maze_cells = """
-┌─┐
-└─┘
-┌─┐
-│ │
-┌──
-└──
-┌──
-│ ┌
-│ │
-└─┘
-│ │
-│ │
-│ └
-└──
-│ └
-│ ┌
-──┐
-──┘
-──┐
-┐ │
-───
-───
-───
-┐ ┌
-┘ │
-──┘
-┘ │
-┐ │
-┘ └
-───
-┘ └
-┐ ┌
-┤ ├
-┤ ├
-┴─┴
-┬─┬""".strip().replace(' ', space_char).split("\n")
+    glyphs = _CELL_GLYPHS_BY_SPACE[space_char]
     width = options.width
-    # Collect into pairs
-    maze_cells = list(zip(maze_cells[:-1:2], maze_cells[1::2]))
-    for y in range(len(conn) // width):
-        for row in range(2):
-            for x in range(width):
-                pos = y * width + x
-                left = 0 if x == 0 else (conn[pos-1]&2)
-                up = 0 if y == 0 else (conn[pos-width]&1)
-                idx = ((left | up)) << 2 | conn[pos]
-                if pos == 0:
-                    idx |= 4
-                elif pos == len(conn) - 1:
-                    idx |= 1
-                if conn[pos] > 3:
-                    idx = 15 + conn[pos] // 4
-                print(maze_cells[idx][row], end="")
-            print()
+    height = len(conn) // width
+    c = conn.reshape(height, width)
+    # Compute the glyph index of every cell in one vectorized pass: build
+    # the _IDX_LUT key from the neighbors' passage bits, gather, then patch
+    # the entrance/exit corners.
+    key = c.copy()
+    key[:, 1:] |= (c[:, :-1] & 2) << 3
+    key[1:, :] |= (c[:-1, :] & 1) << 5
+    idx = _IDX_LUT[key]
+    if c.size > 1:
+        idx[-1, -1] |= 1
+    idx[0, 0] |= 4
+    # Assemble the whole maze and emit it with a single write: one lock
+    # acquisition and one encode instead of two per cell row.
+    out = []
+    for y in range(height):
+        out.append("".join(glyphs[0][idx[y]]))
+        out.append("\n")
+        out.append("".join(glyphs[1][idx[y]]))
+        out.append("\n")
+    sys.stdout.write("".join(out))
 
 
 def write_png(conn, options):
@@ -178,100 +449,109 @@ def write_png(conn, options):
     Assumes entrance/exit at top-left/bottom-right.
     """
 
-    image = Image.new(
-        size=(options.width * options.png_cell_width,
-              options.height * options.png_cell_width),
-        mode="P",
-        color=0)
-    image.putpalette([item for l in options.png_palette for item in l],
-                     rawmode = 'RGBA'[:len(options.png_palette[0])])
-    draw = ImageDraw.Draw(image)
-
+    # Bind the option lookups once; the cell loop below reads them
+    # constantly.
     w = options.width
-    wall_start = (options.png_cell_width - 2*options.png_wall_width -
+    h = options.height
+    cw = options.png_cell_width
+    last = w * h - 1
+    # Draw into one palette-indexed pixel buffer with NumPy slice
+    # assignments; each region write is a single C-level fill instead of a
+    # Python->PIL round trip per rectangle.
+    px = np.zeros((h * cw, w * cw), dtype=np.uint8)
+
+    def fill(x0, y0, x1, y1, value):
+        # Inclusive corners, like ImageDraw.rectangle. Clip at the edges;
+        # negative indices must not wrap around.
+        px[max(y0, 0):max(y1 + 1, 0), max(x0, 0):max(x1 + 1, 0)] = value
+
+    c = conn.reshape(h, w)
+    wall_start = (cw - 2*options.png_wall_width -
                    options.png_passage_width) // 2
     main_start = wall_start + options.png_wall_width
     main_end = main_start + options.png_passage_width
     wall_end = main_end + options.png_wall_width
 
-    for y in range(-1, options.height):
-        base_y = y * options.png_cell_width
+    for y in range(-1, h):
+        base_y = y * cw
         for x in range(-1, w):
             pos = y * w + x
-            base_x = x * options.png_cell_width
-            draw.rectangle((base_x + main_start,
-                            base_y + main_start,
-                            base_x + main_end - 1,
-                            base_y + main_end - 1), fill=2)
-            if y==-1 and x == 0 or y >= 0 and x >= 0 and conn[pos]&1 or pos == len(conn) - 1:
+            base_x = x * cw
+            fill(base_x + main_start, base_y + main_start,
+                 base_x + main_end - 1, base_y + main_end - 1, 2)
+            if y==-1 and x == 0 or y >= 0 and x >= 0 and c[y, x]&1 or pos == last:
                 # Connection down
-                draw.rectangle((base_x + main_start,
-                                base_y + main_end,
-                                base_x + main_end - 1,
-                                base_y + options.png_cell_width + main_start - 1), fill=2)
-                draw.rectangle((base_x + wall_start,
-                                base_y + main_end,
-                                base_x + main_start - 1,
-                                base_y + options.png_cell_width + main_start - 1), fill=1)
-                draw.rectangle((base_x + main_end,
-                                base_y + main_end,
-                                base_x + wall_end - 1,
-                                base_y + options.png_cell_width + main_start - 1), fill=1)
+                fill(base_x + main_start, base_y + main_end,
+                     base_x + main_end - 1, base_y + cw + main_start - 1, 2)
+                fill(base_x + wall_start, base_y + main_end,
+                     base_x + main_start - 1, base_y + cw + main_start - 1, 1)
+                fill(base_x + main_end, base_y + main_end,
+                     base_x + wall_end - 1, base_y + cw + main_start - 1, 1)
             else:
-                draw.rectangle((base_x + wall_start,
-                                base_y + main_end,
-                                base_x + wall_end - 1,
-                                base_y + wall_end - 1), fill=1)
-                draw.rectangle((base_x + wall_start,
-                                base_y + options.png_cell_width + wall_start,
-                                base_x + wall_end - 1,
-                                base_y + options.png_cell_width + main_start - 1), fill=1)
-            if y >= 0 and x >= 0 and conn[pos]&2:
+                fill(base_x + wall_start, base_y + main_end,
+                     base_x + wall_end - 1, base_y + wall_end - 1, 1)
+                fill(base_x + wall_start, base_y + cw + wall_start,
+                     base_x + wall_end - 1, base_y + cw + main_start - 1, 1)
+            if y >= 0 and x >= 0 and c[y, x]&2:
                 # Connection right
-                draw.rectangle((base_x + main_end,
-                                base_y + main_start,
-                                base_x + options.png_cell_width + main_start - 1,
-                                base_y + main_end - 1), fill=2)
-                draw.rectangle((base_x + wall_end,
-                                base_y + wall_start,
-                                base_x + options.png_cell_width + wall_start - 1,
-                                base_y + main_start - 1), fill=1)
-                draw.rectangle((base_x + wall_end,
-                                base_y + main_end,
-                                base_x + options.png_cell_width + wall_start - 1,
-                                base_y + wall_end - 1), fill=1)
+                fill(base_x + main_end, base_y + main_start,
+                     base_x + cw + main_start - 1, base_y + main_end - 1, 2)
+                fill(base_x + wall_end, base_y + wall_start,
+                     base_x + cw + wall_start - 1, base_y + main_start - 1, 1)
+                fill(base_x + wall_end, base_y + main_end,
+                     base_x + cw + wall_start - 1, base_y + wall_end - 1, 1)
             else:
-                draw.rectangle((base_x + main_end,
-                                base_y + main_start,
-                                base_x + wall_end - 1,
-                                base_y + main_end - 1), fill=1)
-                draw.rectangle((base_x + options.png_cell_width + wall_start,
-                                base_y + main_start,
-                                base_x + options.png_cell_width + main_start - 1,
-                                base_y + main_end - 1), fill=1)
+                fill(base_x + main_end, base_y + main_start,
+                     base_x + wall_end - 1, base_y + main_end - 1, 1)
+                fill(base_x + cw + wall_start, base_y + main_start,
+                     base_x + cw + main_start - 1, base_y + main_end - 1, 1)
             if y < 0 or x < 0:
                 continue
-            if conn[pos] == 7:
+            if c[y, x] == 7:
                 # Weave, vertical on top
-                draw.rectangle((base_x + wall_start,
-                                base_y + main_start,
-                                base_x + main_start - 1,
-                                base_y + main_end - 1), fill=1)
-                draw.rectangle((base_x + main_end,
-                                base_y + main_start,
-                                base_x + wall_end - 1,
-                                base_y + main_end - 1), fill=1)
-            elif conn[pos] == 11:
+                fill(base_x + wall_start, base_y + main_start,
+                     base_x + main_start - 1, base_y + main_end - 1, 1)
+                fill(base_x + main_end, base_y + main_start,
+                     base_x + wall_end - 1, base_y + main_end - 1, 1)
+            elif c[y, x] == 11:
                 # Weave, horizontal on top
-                draw.rectangle((base_x + main_start,
-                                base_y + wall_start,
-                                base_x + main_end - 1,
-                                base_y + main_start - 1), fill=1)
-                draw.rectangle((base_x + main_start,
-                                base_y + main_end,
-                                base_x + main_end - 1,
-                                base_y + wall_end - 1), fill=1)
-    image.save(options.png_file, format="png", optimize=True, bits=2)
+                fill(base_x + main_start, base_y + wall_start,
+                     base_x + main_end - 1, base_y + main_start - 1, 1)
+                fill(base_x + main_start, base_y + main_end,
+                     base_x + main_end - 1, base_y + wall_end - 1, 1)
+    _write_png_bytes(px, options.png_palette, options.png_file)
+
+
+def _write_png_bytes(px, pal, out):
+    """Encode a palette-indexed pixel array as a 2-bit PNG.
+
+    Writes the chunks directly: 4 pixels pack into each byte, so the
+    buffer is a quarter the size of an 8bpp image and no imaging library
+    is needed on this path.
+    """
+    height, width = px.shape
+    # Pack 4 pixels per byte, leftmost pixel in the high bits, with the
+    # scanline filter byte (0 = None) prepended to each row.
+    padded = width + (-width % 4)
+    if padded != width:
+        px = np.pad(px, ((0, 0), (0, padded - width)))
+    scan = np.zeros((height, 1 + padded // 4), dtype=np.uint8)
+    scan[:, 1:] = ((px[:, 0::4] << 6) | (px[:, 1::4] << 4) |
+                   (px[:, 2::4] << 2) | px[:, 3::4])
+
+    def chunk(tag, data):
+        return (struct.pack(">I", len(data)) + tag + data +
+                struct.pack(">I", zlib.crc32(tag + data)))
+
+    out.write(b"\x89PNG\r\n\x1a\n")
+    out.write(chunk(b"IHDR",
+                    struct.pack(">IIBBBBB", width, height, 2, 3, 0, 0, 0)))
+    out.write(chunk(b"PLTE", bytes(item for l in pal for item in l[:3])))
+    if len(pal[0]) == 4:
+        out.write(chunk(b"tRNS", bytes(l[3] if len(l) > 3 else 255
+                                       for l in pal)))
+    out.write(chunk(b"IDAT", zlib.compress(scan.tobytes(), 9)))
+    out.write(chunk(b"IEND", b""))
 
 
 def palette(arg):
@@ -326,7 +606,6 @@ if __name__ == "__main__":
 
     maze = genmaze(args)
     if args.png_file:
-        from PIL import Image, ImageDraw
         write_png(maze, args)
     else:
         print_maze(maze, args)